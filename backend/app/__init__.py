@@ -2,6 +2,20 @@
 Voice Sentiment Analysis Backend Package.
 """
 
+import os
+import platform
+
+# oneDNN/PyTorch tuning for Arm CPUs (BF16 fast-math GEMMs, primitive cache,
+# transparent huge pages). Set before any submodule imports torch; values
+# already in the environment win.
+if platform.machine() in ("aarch64", "arm64"):
+    os.environ.setdefault("DNNL_DEFAULT_FPMATH_MODE", "BF16")
+    os.environ.setdefault("LRU_CACHE_CAPACITY", "1024")
+    os.environ.setdefault("THP_MEM_ALLOC_ENABLE", "1")
+
+# Let the PyTorch CUDA allocator grow segments instead of fragmenting
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
 __version__ = "1.0.0"
 __author__ = "AI Assistant"
 
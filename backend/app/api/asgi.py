@@ -0,0 +1,290 @@
+"""
+ASGI (FastAPI) mirror of the analysis endpoints.
+Serves /api/v1/analyze/* on an event loop so uploads, disk I/O and
+response writing don't tie up a worker thread per request.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from secrets import token_hex
+from typing import AsyncIterator, Optional, Union
+
+import orjson
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import FileTarget, ValueTarget
+from werkzeug.utils import secure_filename
+
+from ..config import config
+from ..models.schemas import AudioAnalysisResponse, ErrorResponse
+from ..services.whisper_service import whisper_service
+from ..services.sentiment_service import sentiment_service
+from ..utils.audio_utils import AudioProcessingError
+from .routes import (
+    _ERR_EMPTY_FILENAME,
+    _ERR_EMPTY_TEXT,
+    _ERR_FILE_TOO_LARGE,
+    _ERR_NO_AUDIO,
+    _ERR_NO_TEXT,
+    _dump_json,
+    _dump_static_error,
+    analyze_audio,
+    prepare_audio,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1")
+
+
+def _json_response(
+    payload: Union[BaseModel, dict],
+    status: int = 200,
+) -> Response:
+    """Wrap a serialized payload in a Starlette JSON response."""
+    return Response(
+        _dump_json(payload),
+        status_code=status,
+        media_type="application/json",
+    )
+
+
+def _static_error(payload: dict, status: int) -> Response:
+    """Return a prebuilt error body as a Starlette JSON response."""
+    return Response(
+        _dump_static_error(payload),
+        status_code=status,
+        media_type="application/json",
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Pre-warm models off the event loop before serving."""
+    if config.PRELOAD_MODELS:
+        await asyncio.gather(
+            asyncio.to_thread(whisper_service.load_model),
+            asyncio.to_thread(sentiment_service.load_model),
+        )
+    yield
+
+
+@router.post("/analyze/upload")
+async def analyze_upload(request: Request) -> Response:
+    """
+    Analyze uploaded audio file.
+
+    Request:
+        - multipart/form-data with 'audio' field
+        - Optional 'language' field for language hint
+
+    Returns:
+        JSON response with transcription and sentiment analysis
+    """
+    request_id = token_hex(4)
+    start_time = time.time()
+
+    # Reject a declared oversized body before writing any of it to disk;
+    # chunked bodies are still counted while streaming below
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > config.MAX_CONTENT_LENGTH:
+            return _static_error(_ERR_FILE_TOO_LARGE, 413)
+
+    upload_dir = Path(config.UPLOAD_FOLDER_ABSOLUTE)
+    temp_path = upload_dir / f"{request_id}_upload"
+
+    try:
+        await asyncio.to_thread(upload_dir.mkdir, parents=True, exist_ok=True)
+
+        audio_target = FileTarget(str(temp_path))
+        lang_target = ValueTarget()
+        audio_filename: Optional[str] = None
+        received = 0
+        try:
+            parser = StreamingFormDataParser(headers=request.headers)
+            parser.register("audio", audio_target)
+            parser.register("language", lang_target)
+
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > config.MAX_CONTENT_LENGTH:
+                    return _static_error(_ERR_FILE_TOO_LARGE, 413)
+                # FileTarget writes synchronously; keep it off the loop
+                await asyncio.to_thread(parser.data_received, chunk)
+
+            audio_filename = audio_target.multipart_filename
+        except ParseFailedException as e:
+            logger.warning(f"Malformed multipart upload: {e}")
+
+        # Validate file presence
+        if audio_filename is None:
+            return _static_error(_ERR_NO_AUDIO, 400)
+
+        if audio_filename == "":
+            return _static_error(_ERR_EMPTY_FILENAME, 400)
+
+        filename = secure_filename(audio_filename)
+        temp_path = await asyncio.to_thread(
+            temp_path.rename, upload_dir / f"{request_id}_{filename}"
+        )
+
+        logger.info(f"Processing upload: {filename}")
+
+        temp_path = await asyncio.to_thread(prepare_audio, temp_path)
+        lang_hint = lang_target.value.decode("utf-8").strip() or None
+
+        # Inference blocks, so keep it off the event loop
+        transcription, dominant, all_emotions = await asyncio.to_thread(
+            analyze_audio,
+            temp_path,
+            lang_hint,
+        )
+
+        processing_time = time.time() - start_time
+
+        response = AudioAnalysisResponse.model_construct(
+            success=True,
+            request_id=request_id,
+            transcription=transcription,
+            sentiment=dominant,
+            all_emotions=all_emotions,
+            processing_time_seconds=round(processing_time, 3),
+        )
+
+        return _json_response(response)
+
+    except AudioProcessingError as e:
+        logger.warning(f"Audio processing error: {e}")
+        return _json_response(
+            ErrorResponse.model_construct(
+                error=str(e),
+                error_code="AUDIO_PROCESSING_ERROR",
+            ),
+            400,
+        )
+
+    except Exception as e:
+        logger.error(f"Analysis failed: {e}", exc_info=True)
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Analysis failed",
+                error_code="ANALYSIS_ERROR",
+                details={"exception": str(e)},
+            ),
+            500,
+        )
+
+    finally:
+        # Cleanup temp file
+        try:
+            await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+        except Exception:
+            pass
+
+
+@router.post("/analyze/text")
+async def analyze_text(request: Request) -> Response:
+    """
+    Analyze sentiment of provided text.
+
+    Request:
+        - JSON body with 'text' field
+
+    Returns:
+        JSON response with sentiment analysis
+    """
+    request_id = token_hex(4)
+    start_time = time.time()
+
+    try:
+        try:
+            data = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            data = None
+
+        if not isinstance(data, dict) or "text" not in data:
+            return _static_error(_ERR_NO_TEXT, 400)
+
+        text = data["text"].strip()
+
+        if not text:
+            return _static_error(_ERR_EMPTY_TEXT, 400)
+
+        dominant, all_emotions = await asyncio.to_thread(
+            sentiment_service.analyze_complete, text
+        )
+        processing_time = time.time() - start_time
+
+        return _json_response({
+            "success": True,
+            "request_id": request_id,
+            "text": text,
+            "sentiment": {
+                "label": dominant.label.value,
+                "score": dominant.score,
+            },
+            "all_emotions": {
+                label.value: score for label, score in all_emotions.items()
+            },
+            "processing_time_seconds": round(processing_time, 3),
+        })
+
+    except Exception as e:
+        logger.error(f"Text analysis failed: {e}", exc_info=True)
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Text analysis failed",
+                error_code="ANALYSIS_ERROR",
+            ),
+            500,
+        )
+
+
+def create_asgi_app() -> FastAPI:
+    """
+    Application factory for the ASGI mirror of the analysis API.
+
+    Returns:
+        FastAPI app serving /api/v1/analyze/*
+    """
+    app = FastAPI(
+        title=config.APP_NAME,
+        version=config.APP_VERSION,
+        lifespan=lifespan,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=config.CORS_ORIGINS,
+        allow_credentials=config.CORS_SUPPORTS_CREDENTIALS,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    return app
+
+
+def main():
+    """Run the ASGI app under uvicorn (uses uvloop when installed)."""
+    import uvicorn
+
+    uvicorn.run(
+        create_asgi_app(),
+        host=config.HOST,
+        port=config.PORT,
+        loop="auto",
+    )
+
+
+# Application instance for ASGI servers
+asgi_app = create_asgi_app()
+
+
+if __name__ == "__main__":
+    main()
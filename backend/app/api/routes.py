@@ -4,12 +4,21 @@ Provides endpoints for audio upload, analysis, and health checks.
 """
 
 import logging
-import uuid
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
-
-from flask import Blueprint, request, jsonify, send_file
+from secrets import token_hex
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import orjson
+from flask import Blueprint, Response, request, jsonify, send_file
+from pydantic import BaseModel
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import FileTarget, ValueTarget
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
 from ..config import config
@@ -19,6 +28,8 @@ from ..models.schemas import (
     ErrorResponse,
     HealthResponse,
     SentimentLabel,
+    SentimentResult,
+    TranscriptionResult,
 )
 from ..services.whisper_service import whisper_service
 from ..services.sentiment_service import sentiment_service
@@ -33,17 +44,200 @@ logger = logging.getLogger(__name__)
 
 api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
 
+# Read size for streaming multipart uploads straight to disk
+UPLOAD_READ_CHUNK_SIZE = 64 * 1024
+
+# Dedicated pool for blocking disk work (stat, ffmpeg, unlink) so
+# cooperative workers (gevent/eventlet) can yield while it runs
+_disk_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 4,
+    thread_name_prefix="disk-io",
+)
+
+
+def _run_disk(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking filesystem call on the disk I/O pool and wait for it."""
+    return _disk_executor.submit(fn, *args, **kwargs).result()
+
+
+# Constant error bodies, built once. The timestamp is added per response.
+_ERR_NO_AUDIO = ErrorResponse(
+    error="No audio file provided",
+    error_code="NO_AUDIO_FILE",
+    details={"hint": "Include 'audio' field in multipart/form-data request"},
+).model_dump(exclude={"timestamp"})
+_ERR_EMPTY_FILENAME = ErrorResponse(
+    error="No file selected",
+    error_code="EMPTY_FILENAME",
+).model_dump(exclude={"timestamp"})
+_ERR_NO_TEXT = ErrorResponse(
+    error="No text provided",
+    error_code="NO_TEXT",
+    details={"hint": "Include 'text' field in JSON body"},
+).model_dump(exclude={"timestamp"})
+_ERR_EMPTY_TEXT = ErrorResponse(
+    error="Empty text provided",
+    error_code="EMPTY_TEXT",
+).model_dump(exclude={"timestamp"})
+_ERR_FILE_TOO_LARGE = ErrorResponse(
+    error="File too large",
+    error_code="FILE_TOO_LARGE",
+    details={"max_size_mb": config.AUDIO_MAX_FILE_SIZE_MB},
+).model_dump(exclude={"timestamp"})
+
+
+# Short-lived cache of serialized /health and /models bodies, so frequent
+# liveness/readiness probes don't walk both services (and torch) each time
+INFO_CACHE_TTL_SECONDS = 1.0
+_info_cache: Dict[str, Tuple[float, bytes]] = {}
+
+
+def _get_cached_info(key: str) -> Optional[Response]:
+    """Return a cached JSON body as a response if it is still fresh."""
+    entry = _info_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < INFO_CACHE_TTL_SECONDS:
+        return Response(entry[1], status=200, mimetype="application/json")
+    return None
+
+
+def _cache_info(key: str, response: Response) -> Response:
+    """Store a successful response body under key and return the response."""
+    _info_cache[key] = (time.monotonic(), response.get_data())
+    return response
+
+
+def _invalidate_info_cache() -> None:
+    """Drop cached model info; called when a model is loaded or unloaded."""
+    _info_cache.clear()
+
+
+whisper_service.add_state_listener(_invalidate_info_cache)
+sentiment_service.add_state_listener(_invalidate_info_cache)
+
+
+def _dump_json(payload: Union[BaseModel, dict]) -> bytes:
+    """
+    Serialize a payload to JSON bytes without Flask's jsonify.
+    
+    Pydantic models go through model_dump_json (pydantic-core); plain
+    dicts through orjson. Both handle datetimes and enums natively.
+    Shared with the ASGI mirror, which wraps the bytes in its own response.
+    
+    Args:
+        payload: Pydantic model or JSON-compatible dict
+        
+    Returns:
+        UTF-8 encoded JSON body
+    """
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json().encode("utf-8")
+    return orjson.dumps(payload)
+
+
+def _dump_static_error(payload: dict) -> bytes:
+    """Serialize a prebuilt error body stamped with the current time."""
+    return orjson.dumps({**payload, "timestamp": datetime.utcnow()})
+
+
+def _json_response(
+    payload: Union[BaseModel, dict],
+    status: int = 200,
+) -> Response:
+    """Wrap a serialized payload in a Flask JSON response."""
+    return Response(
+        _dump_json(payload),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def _static_error(payload: dict, status: int) -> Response:
+    """Return a prebuilt error body as a Flask JSON response."""
+    return Response(
+        _dump_static_error(payload),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def prepare_audio(temp_path: Path) -> Path:
+    """
+    Validate an uploaded audio file and convert it to WAV if needed.
+    
+    Args:
+        temp_path: Path of the uploaded file
+        
+    Returns:
+        Path of the WAV file to transcribe (the original is removed
+        if a conversion was needed)
+        
+    Raises:
+        AudioProcessingError: If the file is invalid or conversion fails
+    """
+    is_valid, error_msg = _run_disk(validate_audio_file, temp_path)
+    if not is_valid:
+        raise AudioProcessingError(error_msg)
+
+    if temp_path.suffix.lower() != ".wav":
+        wav_path, _ = _run_disk(convert_to_wav, temp_path)
+        _run_disk(temp_path.unlink)  # Remove original
+        return wav_path
+
+    return temp_path
+
+
+def analyze_audio(
+    wav_path: Path,
+    language: Optional[str] = None,
+) -> Tuple[TranscriptionResult, SentimentResult, Dict[SentimentLabel, float]]:
+    """
+    Transcribe a WAV file and analyze its sentiment.
+    
+    Sentiment runs per segment, so each segment is classified while later
+    ones are still being decoded.
+    
+    Args:
+        wav_path: Path to the WAV file
+        language: Language hint, auto-detected if None
+        
+    Returns:
+        Tuple of (transcription, dominant_sentiment, all_emotions)
+    """
+    segments, info = whisper_service.transcribe_segments(
+        wav_path,
+        language=language,
+    )
+    texts: list[str] = []
+
+    def segment_texts():
+        for segment in segments:
+            texts.append(segment["text"])
+            yield segment["text"], segment["end"] - segment["start"]
+
+    dominant, all_emotions = sentiment_service.analyze_segments(segment_texts())
+
+    transcription = TranscriptionResult(
+        text="".join(texts).strip(),
+        language=info["language"],
+        duration=info["duration"],
+    )
+    return transcription, dominant, all_emotions
+
 
 # ==================== Health & Status Endpoints ====================
 
 @api_bp.route("/health", methods=["GET"])
-def health_check() -> tuple[dict, int]:
+def health_check() -> Response:
     """
     Health check endpoint.
     
     Returns:
         JSON response with service health status
     """
+    cached = _get_cached_info("health")
+    if cached is not None:
+        return cached
+
     try:
         whisper_info = whisper_service.get_model_info()
         sentiment_info = sentiment_service.get_model_info()
@@ -66,52 +260,62 @@ def health_check() -> tuple[dict, int]:
             s.get("status") == "healthy" for s in services.values()
         )
 
-        response = HealthResponse(
+        response = HealthResponse.model_construct(
             status="healthy" if all_healthy else "degraded",
             version=config.APP_VERSION,
             services=services,
         )
 
-        return response.model_dump(), 200
+        return _cache_info("health", _json_response(response))
 
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return ErrorResponse(
-            error="Health check failed",
-            error_code="HEALTH_CHECK_ERROR",
-            details={"exception": str(e)},
-        ).model_dump(), 500
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Health check failed",
+                error_code="HEALTH_CHECK_ERROR",
+                details={"exception": str(e)},
+            ),
+            500,
+        )
 
 
 @api_bp.route("/models", methods=["GET"])
-def get_model_info() -> tuple[dict, int]:
+def get_model_info() -> Response:
     """
     Get information about loaded models.
     
     Returns:
         JSON response with model information
     """
+    cached = _get_cached_info("models")
+    if cached is not None:
+        return cached
+
     try:
         whisper_info = whisper_service.get_model_info()
         sentiment_info = sentiment_service.get_model_info()
 
-        return {
+        return _cache_info("models", _json_response({
             "whisper": whisper_info,
             "sentiment": sentiment_info,
-        }, 200
+        }))
 
     except Exception as e:
         logger.error(f"Model info request failed: {e}")
-        return ErrorResponse(
-            error="Failed to get model info",
-            error_code="MODEL_INFO_ERROR",
-        ).model_dump(), 500
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Failed to get model info",
+                error_code="MODEL_INFO_ERROR",
+            ),
+            500,
+        )
 
 
 # ==================== Analysis Endpoints ====================
 
 @api_bp.route("/analyze/upload", methods=["POST"])
-def analyze_upload() -> tuple[dict, int]:
+def analyze_upload() -> Response:
     """
     Analyze uploaded audio file.
     
@@ -122,76 +326,69 @@ def analyze_upload() -> tuple[dict, int]:
     Returns:
         JSON response with transcription and sentiment analysis
     """
-    request_id = str(uuid.uuid4())[:8]
+    request_id = token_hex(4)
     start_time = time.time()
 
-    # Validate file presence
-    if "audio" not in request.files:
-        return ErrorResponse(
-            error="No audio file provided",
-            error_code="NO_AUDIO_FILE",
-            details={
-                "hint": "Include 'audio' field in multipart/form-data request"
-            },
-        ).model_dump(), 400
+    # The body is parsed incrementally and the audio part is written
+    # straight to disk, so request.files (and werkzeug's MultiPartParser)
+    # is never touched. Oversized bodies are answered by the app's 413
+    # handler: a declared length is rejected up front, and chunked bodies
+    # that run over MAX_CONTENT_LENGTH raise from request.stream and are
+    # re-raised below.
+    if (request.content_length or 0) > config.MAX_CONTENT_LENGTH:
+        raise RequestEntityTooLarge()
+
+    upload_dir = Path(config.UPLOAD_FOLDER_ABSOLUTE)
+    temp_path = upload_dir / f"{request_id}_upload"
 
-    audio_file = request.files["audio"]
-    
-    if audio_file.filename == "":
-        return ErrorResponse(
-            error="No file selected",
-            error_code="EMPTY_FILENAME",
-        ).model_dump(), 400
-
-    # Validate file
-    filename = secure_filename(audio_file.filename)
-    temp_path = Path(config.UPLOAD_FOLDER_ABSOLUTE) / f"{request_id}_{filename}"
-    
     try:
-        # Save uploaded file
-        temp_path.parent.mkdir(parents=True, exist_ok=True)
-        audio_file.save(str(temp_path))
-        
-        logger.info(f"Processing upload: {filename}")
+        _run_disk(upload_dir.mkdir, parents=True, exist_ok=True)
 
-        # Validate audio file
-        is_valid, error_msg = validate_audio_file(temp_path)
-        if not is_valid:
-            raise AudioProcessingError(error_msg)
+        audio_target = FileTarget(str(temp_path))
+        lang_target = ValueTarget()
+        audio_filename: Optional[str] = None
+        try:
+            parser = StreamingFormDataParser(headers=request.headers)
+            parser.register("audio", audio_target)
+            parser.register("language", lang_target)
 
-        # Convert to WAV if needed
-        if temp_path.suffix.lower() != ".wav":
-            wav_path, duration = convert_to_wav(temp_path)
-            temp_path.unlink()  # Remove original
-            temp_path = wav_path
-        else:
-            duration = 0.0
+            while chunk := request.stream.read(UPLOAD_READ_CHUNK_SIZE):
+                parser.data_received(chunk)
 
-        # Get language from request or auto-detect
-        lang_hint = request.form.get("language") or None
+            audio_filename = audio_target.multipart_filename
+        except ParseFailedException as e:
+            logger.warning(f"Malformed multipart upload: {e}")
+
+        # Validate file presence
+        if audio_filename is None:
+            return _static_error(_ERR_NO_AUDIO, 400)
+
+        if audio_filename == "":
+            return _static_error(_ERR_EMPTY_FILENAME, 400)
+
+        # Rename to the client's (sanitized) filename so the extension is kept
+        filename = secure_filename(audio_filename)
+        named_path = upload_dir / f"{request_id}_{filename}"
+        temp_path = _run_disk(temp_path.rename, named_path)
+
+        logger.info(f"Processing upload: {filename}")
+
+        # Validate and convert to WAV if needed
+        temp_path = prepare_audio(temp_path)
 
-        # Load models if not loaded
-        if not whisper_service._model_loaded:
-            whisper_service.load_model()
-        if not sentiment_service._model_loaded:
-            sentiment_service.load_model()
+        # Get language from request or auto-detect
+        lang_hint = lang_target.value.decode("utf-8").strip() or None
 
-        # Transcribe
-        transcription = whisper_service.transcribe(
+        transcription, dominant, all_emotions = analyze_audio(
             temp_path,
             language=lang_hint,
         )
 
-        # Analyze sentiment
-        dominant, all_emotions = sentiment_service.analyze_complete(
-            transcription.text
-        )
-
         # Calculate processing time
         processing_time = time.time() - start_time
 
-        # Build response
-        response = AudioAnalysisResponse(
+        # Build response (fields are server-built, so skip validation)
+        response = AudioAnalysisResponse.model_construct(
             success=True,
             request_id=request_id,
             transcription=transcription,
@@ -200,34 +397,42 @@ def analyze_upload() -> tuple[dict, int]:
             processing_time_seconds=round(processing_time, 3),
         )
 
-        return response.model_dump(), 200
+        return _json_response(response)
 
     except AudioProcessingError as e:
         logger.warning(f"Audio processing error: {e}")
-        return ErrorResponse(
-            error=str(e),
-            error_code="AUDIO_PROCESSING_ERROR",
-        ).model_dump(), 400
+        return _json_response(
+            ErrorResponse.model_construct(
+                error=str(e),
+                error_code="AUDIO_PROCESSING_ERROR",
+            ),
+            400,
+        )
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.error(f"Analysis failed: {e}", exc_info=True)
-        return ErrorResponse(
-            error="Analysis failed",
-            error_code="ANALYSIS_ERROR",
-            details={"exception": str(e)},
-        ).model_dump(), 500
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Analysis failed",
+                error_code="ANALYSIS_ERROR",
+                details={"exception": str(e)},
+            ),
+            500,
+        )
 
     finally:
         # Cleanup temp file
         try:
-            if temp_path.exists():
-                temp_path.unlink()
+            temp_path.unlink(missing_ok=True)
         except Exception:
             pass
 
 
 @api_bp.route("/analyze/text", methods=["POST"])
-def analyze_text() -> tuple[dict, int]:
+def analyze_text() -> Response:
     """
     Analyze sentiment of provided text.
     
@@ -237,36 +442,25 @@ def analyze_text() -> tuple[dict, int]:
     Returns:
         JSON response with sentiment analysis
     """
-    request_id = str(uuid.uuid4())[:8]
+    request_id = token_hex(4)
     start_time = time.time()
 
     try:
         data = request.get_json()
         
         if not data or "text" not in data:
-            return ErrorResponse(
-                error="No text provided",
-                error_code="NO_TEXT",
-                details={"hint": "Include 'text' field in JSON body"},
-            ).model_dump(), 400
+            return _static_error(_ERR_NO_TEXT, 400)
 
         text = data["text"].strip()
         
         if not text:
-            return ErrorResponse(
-                error="Empty text provided",
-                error_code="EMPTY_TEXT",
-            ).model_dump(), 400
-
-        # Load model if not loaded
-        if not sentiment_service._model_loaded:
-            sentiment_service.load_model()
+            return _static_error(_ERR_EMPTY_TEXT, 400)
 
         # Analyze sentiment
         dominant, all_emotions = sentiment_service.analyze_complete(text)
         processing_time = time.time() - start_time
 
-        return {
+        return _json_response({
             "success": True,
             "request_id": request_id,
             "text": text,
@@ -278,25 +472,28 @@ def analyze_text() -> tuple[dict, int]:
                 label.value: score for label, score in all_emotions.items()
             },
             "processing_time_seconds": round(processing_time, 3),
-        }, 200
+        })
 
     except Exception as e:
         logger.error(f"Text analysis failed: {e}", exc_info=True)
-        return ErrorResponse(
-            error="Text analysis failed",
-            error_code="ANALYSIS_ERROR",
-        ).model_dump(), 500
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Text analysis failed",
+                error_code="ANALYSIS_ERROR",
+            ),
+            500,
+        )
 
 
 @api_bp.route("/analyze/stream/start", methods=["POST"])
-def start_streaming_session() -> tuple[dict, int]:
+def start_streaming_session() -> Response:
     """
     Start a streaming analysis session.
     
     Returns:
         JSON response with session ID and configuration
     """
-    session_id = str(uuid.uuid4())[:8]
+    session_id = token_hex(4)
     
     try:
         data = request.get_json() or {}
@@ -311,7 +508,7 @@ def start_streaming_session() -> tuple[dict, int]:
             "status": "active",
         }
 
-        return {
+        return _json_response({
             "success": True,
             "session_id": session_id,
             "language": language,
@@ -320,20 +517,23 @@ def start_streaming_session() -> tuple[dict, int]:
                 "chunk_duration_ms": config.AUDIO_CHUNK_DURATION_MS,
                 "max_duration_seconds": config.AUDIO_MAX_DURATION,
             },
-        }, 200
+        })
 
     except Exception as e:
         logger.error(f"Failed to start streaming session: {e}")
-        return ErrorResponse(
-            error="Failed to start session",
-            error_code="SESSION_ERROR",
-        ).model_dump(), 500
+        return _json_response(
+            ErrorResponse.model_construct(
+                error="Failed to start session",
+                error_code="SESSION_ERROR",
+            ),
+            500,
+        )
 
 
 # ==================== Documentation Endpoint ====================
 
 @api_bp.route("/docs", methods=["GET"])
-def get_api_docs() -> tuple[dict, int]:
+def get_api_docs() -> Response:
     """
     Return API documentation.
     
@@ -387,34 +587,43 @@ def get_api_docs() -> tuple[dict, int]:
         "supported_emotions": [e.value for e in SentimentLabel],
     }
 
-    return docs, 200
+    return _json_response(docs)
 
 
 # ==================== Error Handlers ====================
 
 @api_bp.errorhandler(400)
-def bad_request(error) -> tuple[dict, int]:
+def bad_request(error) -> Response:
     """Handle 400 Bad Request errors."""
-    return ErrorResponse(
-        error=str(error.description),
-        error_code="BAD_REQUEST",
-    ).model_dump(), 400
+    return _json_response(
+        ErrorResponse.model_construct(
+            error=str(error.description),
+            error_code="BAD_REQUEST",
+        ),
+        400,
+    )
 
 
 @api_bp.errorhandler(404)
-def not_found(error) -> tuple[dict, int]:
+def not_found(error) -> Response:
     """Handle 404 Not Found errors."""
-    return ErrorResponse(
-        error="Endpoint not found",
-        error_code="NOT_FOUND",
-    ).model_dump(), 404
+    return _json_response(
+        ErrorResponse.model_construct(
+            error="Endpoint not found",
+            error_code="NOT_FOUND",
+        ),
+        404,
+    )
 
 
 @api_bp.errorhandler(500)
-def internal_error(error) -> tuple[dict, int]:
+def internal_error(error) -> Response:
     """Handle 500 Internal Server errors."""
-    return ErrorResponse(
-        error="Internal server error",
-        error_code="INTERNAL_ERROR",
-    ).model_dump(), 500
+    return _json_response(
+        ErrorResponse.model_construct(
+            error="Internal server error",
+            error_code="INTERNAL_ERROR",
+        ),
+        500,
+    )
 
@@ -6,8 +6,8 @@ Provides WebSocket endpoints for live audio processing.
 import json
 import logging
 import time
-import uuid
 from typing import Dict, Optional
+from secrets import token_hex
 import threading
 
 from flask import Blueprint
@@ -100,7 +100,7 @@ def register_handlers(sio: SocketIO) -> None:
         }
         """
         client_id = request.sid
-        session_id = str(uuid.uuid4())[:8]
+        session_id = token_hex(4)
         language = data.get("language") if data else None
         
         logger.info(f"Starting session {session_id} for client {client_id}")
@@ -35,7 +35,9 @@ class Config:
     # Whisper Model Settings
     WHISPER_MODEL_SIZE: str = os.getenv("WHISPER_MODEL_SIZE", "base")  # tiny, base, small, medium, large
     WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "auto")  # auto, cpu, cuda
-    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "default")  # default, int8, int16
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "default")  # default, int8, int8_float16, float16, float32
+    WHISPER_THREADS: int = int(os.getenv("WHISPER_THREADS", "0"))  # CPU threads per transcription, 0 = CTranslate2 default
+    WHISPER_NUM_WORKERS: int = int(os.getenv("WHISPER_NUM_WORKERS", "1"))  # Concurrent transcriptions per model
 
     # Sentiment Model Settings
     SENTIMENT_MODEL_NAME: str = os.getenv(
@@ -43,7 +45,15 @@ class Config:
         "j-hartmann/emotion-english-distilroberta-base"
     )
     SENTIMENT_DEVICE: str = os.getenv("SENTIMENT_DEVICE", "auto")
+    SENTIMENT_COMPUTE_TYPE: str = os.getenv("SENTIMENT_COMPUTE_TYPE", "fp32")  # fp32, fp16, int8
+    SENTIMENT_USE_BETTER_TRANSFORMER: bool = (
+        os.getenv("SENTIMENT_USE_BETTER_TRANSFORMER", "False").lower() == "true"
+    )  # Fused attention kernels (+ torch.compile on CUDA)
     SENTIMENT_TOP_K: int = int(os.getenv("SENTIMENT_TOP_K", "1"))  # Number of top emotions to return
+    SENTIMENT_MAX_BATCH: int = int(os.getenv("SENTIMENT_MAX_BATCH", "16"))  # Max texts per forward pass
+    SENTIMENT_MAX_WAIT_MS: float = float(os.getenv("SENTIMENT_MAX_WAIT_MS", "10"))  # Batch coalescing window
+    SENTIMENT_CACHE_SIZE: int = int(os.getenv("SENTIMENT_CACHE_SIZE", "4096"))  # 0 disables result cache
+    TORCH_NUM_THREADS: int = int(os.getenv("TORCH_NUM_THREADS", "0"))  # Intra-op threads, 0 = torch default
 
     # Audio Processing Settings
     AUDIO_SAMPLE_RATE: int = 16000
@@ -87,6 +97,7 @@ class Config:
 
     # Model Cache Settings
     MODEL_CACHE_DIR: Path = Path(os.getenv("MODEL_CACHE_DIR", "./models"))
+    PRELOAD_MODELS: bool = os.getenv("PRELOAD_MODELS", "True").lower() == "true"
     
     # Paths (computed)
     @property
@@ -120,6 +131,14 @@ class Config:
                 f"got '{self.WHISPER_MODEL_SIZE}'"
             )
 
+        # Validate sentiment compute type
+        valid_compute_types = ["fp32", "fp16", "int8"]
+        if self.SENTIMENT_COMPUTE_TYPE not in valid_compute_types:
+            raise ValueError(
+                f"SENTIMENT_COMPUTE_TYPE must be one of {valid_compute_types}, "
+                f"got '{self.SENTIMENT_COMPUTE_TYPE}'"
+            )
+
         # Validate audio formats
         if not all(fmt.startswith(".") for fmt in self.AUDIO_SUPPORTED_FORMATS):
             raise ValueError("AUDIO_SUPPORTED_FORMATS must start with '.'")
@@ -138,6 +157,7 @@ class TestingConfig(Config):
     TESTING: bool = True
     LOG_LEVEL: str = "DEBUG"
     # Use smaller models for faster tests
+    PRELOAD_MODELS: bool = False
     WHISPER_MODEL_SIZE: str = "tiny"
     SENTIMENT_MODEL_NAME: str = "j-hartmann/emotion-english-distilroberta-base"
 
@@ -5,13 +5,14 @@ Voice Sentiment Analysis API with REST and WebSocket support.
 
 import logging
 import sys
+import threading
 from pathlib import Path
 
 from flask import Flask, jsonify
 from flask_cors import CORS
 
 from .config import config
-from .api.routes import api_bp
+from .api.routes import _ERR_FILE_TOO_LARGE, _static_error, api_bp
 from .api.websocket import init_socketio
 from .services.whisper_service import whisper_service
 from .services.sentiment_service import sentiment_service
@@ -65,11 +66,20 @@ def create_app() -> tuple[Flask, any]:
     # Register error handlers
     register_error_handlers(app)
     
-    # Load models on startup (optional, can be lazy loaded)
-    @app.before_request
-    def before_first_request():
-        """Load models on first request for faster responses."""
-        pass  # Models are lazy loaded in services
+    # Pre-warm models in the background so requests never pay the load
+    if config.PRELOAD_MODELS:
+        def prewarm_models():
+            """Load models off the request path."""
+            try:
+                init_models()
+            except Exception as e:
+                logger.error(f"Model pre-warm failed: {e}")
+
+        threading.Thread(
+            target=prewarm_models,
+            name="model-prewarm",
+            daemon=True,
+        ).start()
     
     # Root route - serve frontend
     @app.route("/")
@@ -114,14 +124,7 @@ def register_error_handlers(app: Flask) -> None:
     
     @app.errorhandler(413)
     def payload_too_large(error):
-        return jsonify({
-            "success": False,
-            "error": "File too large",
-            "error_code": "FILE_TOO_LARGE",
-            "details": {
-                "max_size_mb": config.AUDIO_MAX_FILE_SIZE_MB,
-            },
-        }), 413
+        return _static_error(_ERR_FILE_TOO_LARGE, 413)
     
     @app.errorhandler(500)
     def internal_error(error):
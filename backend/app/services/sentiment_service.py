@@ -4,25 +4,126 @@ Provides emotion detection using pre-trained transformer models.
 """
 
 import logging
+import queue
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Callable, Dict, Iterable, Optional, List, Any, Sequence, Tuple
 
+import numpy as np
 import torch
 from transformers import (
     AutoModelForSequenceClassification,
     AutoTokenizer,
-    pipeline,
 )
 
 from ..config import config
 from ..models.schemas import SentimentLabel, SentimentResult
+from .state_listeners import StateListenerMixin
 
 logger = logging.getLogger(__name__)
 
 
-class SentimentService:
+class _BatchRunner:
+    """
+    Dynamic batcher that coalesces concurrent texts into one forward pass.
+    
+    Texts submitted from request threads are queued; a background consumer
+    drains up to ``max_batch`` items (waiting at most ``max_wait_ms`` after
+    the first one arrives) and runs them through ``infer`` together.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[List[str]], Sequence[Any]],
+        max_batch: int = 16,
+        max_wait_ms: float = 10.0,
+    ):
+        """
+        Initialize the batch runner.
+        
+        Args:
+            infer: Callable mapping a list of texts to a list of outputs
+            max_batch: Maximum number of texts per forward pass
+            max_wait_ms: Time to wait for more texts after the first arrives
+        """
+        self._infer = infer
+        self._max_batch = max(1, max_batch)
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue a text for classification.
+        
+        Args:
+            text: Input text to classify
+            
+        Returns:
+            Future resolved with the per-text classifier output
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_started(self) -> None:
+        """Start the consumer thread on first use."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="sentiment-batcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """Block for one item, then drain more until full or timed out."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait
+
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Drop requests whose callers already gave up
+        return [
+            (text, future)
+            for text, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+
+    def _run(self) -> None:
+        """Consumer loop."""
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            try:
+                outputs = self._infer([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+
+class SentimentService(StateListenerMixin):
     """
     Service for sentiment/emotion analysis using Transformers.
     
@@ -43,6 +144,12 @@ class SentimentService:
         "surprise": SentimentLabel.SURPRISE,
     }
 
+    # Tokenizer truncation length (model max positions)
+    MAX_SEQ_LENGTH = 512
+
+    # Zero score for every label; copied, never handed out directly
+    _EMPTY_SCORES: Dict[SentimentLabel, float] = dict.fromkeys(SentimentLabel, 0.0)
+
     def __new__(cls) -> "SentimentService":
         """Singleton pattern to avoid reloading model."""
         if cls._instance is None:
@@ -59,12 +166,28 @@ class SentimentService:
 
         self.model_name: str = config.SENTIMENT_MODEL_NAME
         self.device: str = config.SENTIMENT_DEVICE
+        self.compute_type: str = config.SENTIMENT_COMPUTE_TYPE
         self.tokenizer: Optional[AutoTokenizer] = None
         self.model: Optional[AutoModelForSequenceClassification] = None
         self.classifier: Optional[Any] = None
         self._load_time: Optional[float] = None
         self._model_loaded: bool = False
         self._labels: List[str] = []
+        self._idx_to_label: List[SentimentLabel] = []
+        # CUDA only: pinned host / persistent device input buffers per key
+        self._input_buffers: Dict[str, Tuple[torch.Tensor, torch.Tensor]] = {}
+        self._h2d_stream: Optional[Any] = None
+        self._init_state_listeners()
+        self._cache_size: int = config.SENTIMENT_CACHE_SIZE
+        self._exact_cache: OrderedDict[
+            str, Tuple[SentimentResult, Dict[SentimentLabel, float]]
+        ] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._batcher = _BatchRunner(
+            self._infer_raw,
+            max_batch=config.SENTIMENT_MAX_BATCH,
+            max_wait_ms=config.SENTIMENT_MAX_WAIT_MS,
+        )
 
         self._initialized = True
         logger.info(f"SentimentService initialized with model: {self.model_name}")
@@ -80,6 +203,14 @@ class SentimentService:
             logger.info("Sentiment model already loaded, skipping reload")
             return
 
+        with self._lock:
+            # Another thread (e.g. startup pre-warm) may have just loaded it
+            if self._model_loaded and not force_reload:
+                return
+            self._load_model()
+
+    def _load_model(self) -> None:
+        """Load the model; callers must hold ``_lock``."""
         start_time = time.time()
 
         try:
@@ -91,28 +222,48 @@ class SentimentService:
                 f"Loading sentiment model '{self.model_name}' on {self.device}"
             )
 
-            # Load tokenizer and model
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                self.model_name
-            )
-            self.model.to(self.device)
-            self.model.eval()
-
-            # Get labels from model config
-            self._labels = self.model.config.id2label.values()  # type: ignore
-
-            # Create pipeline for easier inference
-            self.classifier = pipeline(
-                "text-classification",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=self.device if self.device != "cpu" else -1,
-                top_k=None,  # Return all scores
+            if self.device == "cpu":
+                self._configure_threads()
+
+            # Load tokenizer and model (Rust-backed fast tokenizer)
+            self.tokenizer = AutoTokenizer.from_pretrained(
+                self.model_name, use_fast=True
             )
+            if not self.tokenizer.is_fast:
+                logger.warning(
+                    f"No fast tokenizer for '{self.model_name}', using the slow one"
+                )
+
+            if self.compute_type == "int8":
+                self.model = self._load_quantized_model()
+            else:
+                self.model = AutoModelForSequenceClassification.from_pretrained(
+                    self.model_name
+                )
+                if self.compute_type == "fp16" and self.device == "cuda":
+                    self.model.half()
+                self.model.to(self.device)
+                self.model.eval()
+
+                if config.SENTIMENT_USE_BETTER_TRANSFORMER:
+                    self._optimize_model()
+
+                if self.device == "cuda":
+                    self._allocate_input_buffers()
+
+            # Get labels from model config, and resolve each output index to
+            # our enum once so requests only do a list lookup
+            id2label = self.model.config.id2label
+            self._labels = list(id2label.values())
+            self._idx_to_label = [
+                self.EMOTION_MAPPING.get(id2label[idx], SentimentLabel.NEUTRAL)
+                for idx in range(self.model.config.num_labels)
+            ]
 
             self._load_time = time.time() - start_time
             self._model_loaded = True
+            self.clear_cache()
+            self._notify_state_changed()
 
             logger.info(
                 f"Sentiment model loaded successfully in {self._load_time:.2f}s"
@@ -122,6 +273,196 @@ class SentimentService:
             logger.error(f"Failed to load sentiment model: {e}")
             raise RuntimeError(f"Sentiment model loading failed: {e}")
 
+    @staticmethod
+    def _configure_threads() -> None:
+        """Pin torch CPU thread pools so concurrent workers don't oversubscribe."""
+        if config.TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(config.TORCH_NUM_THREADS)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set once, before any inter-op work has started
+            pass
+
+    def _allocate_input_buffers(self) -> None:
+        """
+        Preallocate pinned host and device buffers for a full batch.
+        
+        Buffers are flat so a (batch, seq_len) view of any prefix stays
+        contiguous; only the batcher thread uses them.
+        """
+        numel = config.SENTIMENT_MAX_BATCH * self.MAX_SEQ_LENGTH
+        self._input_buffers = {
+            key: (
+                torch.zeros(numel, dtype=torch.long, pin_memory=True),
+                torch.zeros(numel, dtype=torch.long, device=self.device),
+            )
+            for key in ("input_ids", "attention_mask")
+        }
+        self._h2d_stream = torch.cuda.Stream()
+
+    def _to_device(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """
+        Move tokenized inputs to the model device.
+        
+        On CUDA, copies go through the pinned buffers on a dedicated stream
+        instead of allocating fresh device tensors per request.
+        """
+        batch_size, seq_len = inputs["input_ids"].shape
+        numel = batch_size * seq_len
+
+        if not self._input_buffers or numel > (
+            config.SENTIMENT_MAX_BATCH * self.MAX_SEQ_LENGTH
+        ):
+            return {key: value.to(self.device) for key, value in inputs.items()}
+
+        device_inputs: Dict[str, torch.Tensor] = {}
+        with torch.cuda.stream(self._h2d_stream):
+            for key, value in inputs.items():
+                if key not in self._input_buffers:
+                    device_inputs[key] = value.to(self.device, non_blocking=True)
+                    continue
+                host, device = self._input_buffers[key]
+                host_view = host[:numel].view(batch_size, seq_len)
+                host_view.copy_(value)
+                device_view = device[:numel].view(batch_size, seq_len)
+                device_view.copy_(host_view, non_blocking=True)
+                device_inputs[key] = device_view
+
+        # Model runs on the default stream; wait for the uploads
+        torch.cuda.current_stream().wait_stream(self._h2d_stream)
+        return device_inputs
+
+    def _optimize_model(self) -> None:
+        """
+        Swap in fused attention kernels and, on CUDA, compile the model.
+        
+        Runs a warm-up forward pass so kernel selection and compilation
+        happen at load time rather than on the first request.
+        """
+        try:
+            from optimum.bettertransformer import BetterTransformer
+
+            self.model = BetterTransformer.transform(
+                self.model, keep_original_model=False
+            )
+        except Exception as e:
+            logger.warning(f"BetterTransformer unavailable, keeping eager model: {e}")
+
+        if self.device == "cuda":
+            self.model = torch.compile(
+                self.model, mode="reduce-overhead", fullgraph=False
+            )
+
+        inputs = self.tokenizer(
+            ["Warm-up pass for the sentiment model."],
+            return_tensors="pt",
+        ).to(self.device)
+        with torch.inference_mode():
+            self.model(**inputs)
+
+    def _load_quantized_model(self) -> Any:
+        """
+        Load a dynamically quantized INT8 ONNX Runtime model.
+        
+        The ONNX export and quantization run once; the artifact is cached
+        under MODEL_CACHE_DIR keyed by model name and reused afterwards.
+        
+        Returns:
+            ORTModelForSequenceClassification running the INT8 graph
+        """
+        from optimum.onnxruntime import (
+            ORTModelForSequenceClassification,
+            ORTQuantizer,
+        )
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        # ONNX Runtime dynamic INT8 kernels are CPU-only
+        if self.device != "cpu":
+            logger.warning(
+                f"INT8 sentiment model runs on CPU, ignoring device '{self.device}'"
+            )
+            self.device = "cpu"
+
+        cache_dir = (
+            config.MODEL_CACHE_DIR_ABSOLUTE
+            / "onnx"
+            / self.model_name.replace("/", "--")
+            / "int8"
+        )
+        quantized_file = "model_quantized.onnx"
+
+        if not (cache_dir / quantized_file).exists():
+            logger.info(f"Quantizing sentiment model to INT8 in {cache_dir}")
+            ort_model = ORTModelForSequenceClassification.from_pretrained(
+                self.model_name, export=True
+            )
+            quantizer = ORTQuantizer.from_pretrained(ort_model)
+            quantizer.quantize(
+                save_dir=cache_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(
+                    is_static=False, per_channel=False
+                ),
+            )
+
+        return ORTModelForSequenceClassification.from_pretrained(
+            cache_dir, file_name=quantized_file
+        )
+
+    def _infer_raw(self, texts: List[str]) -> np.ndarray:
+        """
+        Tokenize and run the model directly, without the HF pipeline.
+        
+        Args:
+            texts: Input texts to classify
+            
+        Returns:
+            Array of shape (len(texts), num_labels) with softmax probabilities
+        """
+        if not self._model_loaded:
+            self.load_model()
+
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.MAX_SEQ_LENGTH,
+            return_tensors="pt",
+        )
+
+        with torch.inference_mode():
+            logits = self.model(**self._to_device(inputs)).logits
+
+        return logits.float().softmax(-1).cpu().numpy()
+
+    def _run_once(self, text: str) -> np.ndarray:
+        """
+        Classify a single text through the shared batcher.
+        
+        Args:
+            text: Input text to classify
+            
+        Returns:
+            Probability per model label, indexed by model.config.id2label
+        """
+        return self._batcher.submit(text).result()
+
+    def _map_scores(self, probs: np.ndarray) -> Dict[SentimentLabel, float]:
+        """Map model probabilities onto a score for every SentimentLabel."""
+        # Start from all labels so any the model lacks are present as 0.0
+        all_scores = self._EMPTY_SCORES.copy()
+        all_scores.update(zip(self._idx_to_label, probs.tolist()))
+        return all_scores
+
+    def _dominant(self, probs: np.ndarray) -> SentimentResult:
+        """Pick the highest-probability emotion with a single argmax."""
+        idx = int(probs.argmax())
+
+        return SentimentResult(
+            label=self._idx_to_label[idx],
+            score=float(probs[idx]),
+        )
+
     def analyze(
         self,
         text: str,
@@ -137,54 +478,13 @@ class SentimentService:
         Returns:
             SentimentResult with dominant emotion and score
         """
-        if not self._model_loaded:
-            self.load_model()
-
         if not text or not text.strip():
             raise ValueError("Input text cannot be empty")
 
         logger.debug(f"Analyzing sentiment for text: {text[:50]}...")
 
         try:
-            # Run classification
-            results = self.classifier(text)
-
-            # Handle different return formats
-            if isinstance(results, list) and len(results) > 0:
-                if isinstance(results[0], list):
-                    # Multiple inputs, take first
-                    results = results[0]
-
-                # Extract scores
-                if isinstance(results[0], dict) and "score" in results[0]:
-                    # Format: [{"label": "joy", "score": 0.9}, ...]
-                    scores = {
-                        r["label"]: r["score"]
-                        for r in sorted(results, key=lambda x: x["score"], reverse=True)
-                    }
-                else:
-                    # Already processed format
-                    scores = results if isinstance(results, dict) else {}
-            else:
-                scores = {}
-
-            # Find dominant emotion
-            if scores:
-                dominant_label = max(scores, key=scores.get)  # type: ignore
-                dominant_score = scores[dominant_label]  # type: ignore
-            else:
-                dominant_label = "neutral"
-                dominant_score = 1.0
-
-            # Map to our enum
-            mapped_label = self.EMOTION_MAPPING.get(
-                dominant_label, SentimentLabel.NEUTRAL
-            )
-
-            return SentimentResult(
-                label=mapped_label,
-                score=dominant_score,
-            )
+            return self._dominant(self._run_once(text))
 
         except Exception as e:
             logger.error(f"Sentiment analysis failed: {e}")
@@ -203,33 +503,11 @@ class SentimentService:
         Returns:
             Dictionary mapping emotion labels to confidence scores
         """
-        if not self._model_loaded:
-            self.load_model()
-
         if not text or not text.strip():
-            return {label: 0.0 for label in SentimentLabel}
+            return self._EMPTY_SCORES.copy()
 
         try:
-            results = self.classifier(text)
-
-            # Handle multiple inputs
-            if isinstance(results, list):
-                results = results[0]
-
-            # Extract all scores
-            all_scores: Dict[SentimentLabel, float] = {}
-            for result in results:
-                label = result.get("label", "unknown")
-                score = result.get("score", 0.0)
-                mapped = self.EMOTION_MAPPING.get(label, SentimentLabel.NEUTRAL)
-                all_scores[mapped] = score
-
-            # Ensure all labels present
-            for label in SentimentLabel:
-                if label not in all_scores:
-                    all_scores[label] = 0.0
-
-            return all_scores
+            return self._map_scores(self._run_once(text))
 
         except Exception as e:
             logger.error(f"Full sentiment analysis failed: {e}")
@@ -242,15 +520,117 @@ class SentimentService:
         """
         Complete sentiment analysis with all scores.
         
+        Runs the classifier once and derives both the dominant emotion
+        and the full score dictionary from the same output.
+        
         Args:
             text: Input text to analyze
             
         Returns:
             Tuple of (dominant_result, all_scores_dict)
         """
-        dominant = self.analyze(text)
-        all_scores = self.analyze_with_all_scores(text)
-        return dominant, all_scores
+        if not text or not text.strip():
+            raise ValueError("Input text cannot be empty")
+
+        # Collapse whitespace but keep case: the tokenizer is cased. The
+        # model runs on the key itself so cached and fresh results agree.
+        key = " ".join(text.split())
+        cached = self._cache_get(key)
+        if cached is not None:
+            dominant, all_scores = cached
+            return dominant, dict(all_scores)
+
+        logger.debug(f"Analyzing sentiment for text: {text[:50]}...")
+
+        try:
+            probs = self._run_once(key)
+            dominant = self._dominant(probs)
+            all_scores = self._map_scores(probs)
+            self._cache_put(key, (dominant, all_scores))
+            return dominant, dict(all_scores)
+
+        except Exception as e:
+            logger.error(f"Sentiment analysis failed: {e}")
+            raise RuntimeError(f"Sentiment analysis error: {e}")
+
+    def analyze_segments(
+        self,
+        segments: Iterable[Tuple[str, float]],
+    ) -> tuple[SentimentResult, Dict[SentimentLabel, float]]:
+        """
+        Analyze a stream of text segments and aggregate their emotions.
+        
+        Each segment is queued on the batcher as soon as it is yielded, so
+        classification overlaps with whatever is producing the segments
+        (e.g. a lazy transcription). Scores are averaged weighted by the
+        segment weight, typically its duration in seconds.
+        
+        Args:
+            segments: Iterable of (text, weight) pairs
+            
+        Returns:
+            Tuple of (dominant_result, all_scores_dict)
+        """
+        pending = [
+            (self._batcher.submit(text), max(weight, 0.0))
+            for text, weight in segments
+            if text and text.strip()
+        ]
+
+        if not pending:
+            raise ValueError("Input text cannot be empty")
+
+        try:
+            weights = np.array([weight for _, weight in pending], dtype=np.float64)
+            total_weight = weights.sum()
+            if total_weight > 0:
+                weights /= total_weight
+            else:
+                # Fall back to equal weighting when no durations are known
+                weights.fill(1.0 / len(pending))
+
+            # Weighted mean over the raw probability rows, then a single
+            # argmax and label mapping on the result
+            probs = np.stack([future.result() for future, _ in pending])
+            aggregate = np.clip(weights @ probs, 0.0, 1.0)
+
+            return self._dominant(aggregate), self._map_scores(aggregate)
+
+        except Exception as e:
+            logger.error(f"Segment sentiment analysis failed: {e}")
+            raise RuntimeError(f"Segment sentiment analysis error: {e}")
+
+    def _cache_get(
+        self,
+        key: str,
+    ) -> Optional[Tuple[SentimentResult, Dict[SentimentLabel, float]]]:
+        """Look up a cached result and mark it most recently used."""
+        if self._cache_size <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._exact_cache.get(key)
+            if entry is not None:
+                self._exact_cache.move_to_end(key)
+            return entry
+
+    def _cache_put(
+        self,
+        key: str,
+        entry: Tuple[SentimentResult, Dict[SentimentLabel, float]],
+    ) -> None:
+        """Insert a result, evicting the least recently used entry if full."""
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._exact_cache[key] = entry
+            self._exact_cache.move_to_end(key)
+            if len(self._exact_cache) > self._cache_size:
+                self._exact_cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        """Drop all cached analysis results."""
+        with self._cache_lock:
+            self._exact_cache.clear()
 
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model."""
@@ -260,9 +640,10 @@ class SentimentService:
         info = {
             "model_name": self.model_name,
             "device": self.device,
+            "compute_type": self.compute_type,
             "is_loaded": self._model_loaded,
             "load_time_seconds": self._load_time,
-            "labels": list(self._labels),
+            "labels": self._labels,
         }
 
         # Add memory info
@@ -282,7 +663,11 @@ class SentimentService:
             self.model = None
             self.tokenizer = None
             self.classifier = None
+            self._input_buffers = {}
+            self._h2d_stream = None
             self._model_loaded = False
+            self.clear_cache()
+            self._notify_state_changed()
 
             # Clear CUDA cache
             if torch.cuda.is_available():
@@ -0,0 +1,35 @@
+"""
+Model state change notifications shared by the model services.
+"""
+
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class StateListenerMixin:
+    """
+    Callback registry for services whose model can be loaded or unloaded.
+
+    Services call ``_init_state_listeners`` from ``__init__`` and
+    ``_notify_state_changed`` after every load or unload.
+    """
+
+    _state_listeners: List[Callable[[], None]]
+
+    def _init_state_listeners(self) -> None:
+        """Create the empty listener list."""
+        self._state_listeners = []
+
+    def add_state_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback run after the model is loaded or unloaded."""
+        self._state_listeners.append(callback)
+
+    def _notify_state_changed(self) -> None:
+        """Run state listeners, e.g. to drop cached model info."""
+        for callback in self._state_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Model state listener failed: {e}")
@@ -1,36 +1,58 @@
 """
 Whisper Service for Speech-to-Text transcription.
-Provides audio transcription using OpenAI's Whisper model.
+Provides audio transcription using Whisper on faster-whisper (CTranslate2).
 """
 
-import os
+import gc
 import logging
-import tempfile
 import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    TYPE_CHECKING,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 import time
 
 import numpy as np
-import torch
-import whisper
-from scipy.io import wavfile
 
 from ..config import config
 from ..models.schemas import TranscriptionResult
+from .state_listeners import StateListenerMixin
+from ..utils.audio_utils import resample_audio
+
+# faster-whisper (CTranslate2) and torch are imported where the model is
+# loaded, so importing this module stays cheap
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
+    from faster_whisper.tokenizer import Tokenizer
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Whisper models are trained on 16 kHz input
+WHISPER_SAMPLE_RATE = 16000
 
-class WhisperService:
+
+class WhisperService(StateListenerMixin):
     """
-    Service for speech-to-text transcription using OpenAI Whisper.
+    Service for speech-to-text transcription using faster-whisper.
     
     Features:
     - Load and cache Whisper model
     - Transcribe audio files
     - Support for multiple model sizes
-    - Device optimization (CPU/CUDA)
+    - Device optimization (CPU/CUDA) with INT8 weights
     """
 
     _instance: Optional["WhisperService"] = None
@@ -38,11 +60,16 @@ class WhisperService:
 
     def __new__(cls) -> "WhisperService":
         """Singleton pattern to avoid reloading model."""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
+        # Fast path: no lock once the instance exists
+        instance = cls._instance
+        if instance is not None:
+            return instance
+
+        with cls._lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                cls._instance = instance
         return cls._instance
 
     def __init__(self):
@@ -50,11 +77,16 @@ class WhisperService:
         if self._initialized:
             return
 
-        self.model: Optional[whisper.Whisper] = None
+        self.model: Optional["WhisperModel"] = None
         self.model_size: str = config.WHISPER_MODEL_SIZE
         self.device: str = config.WHISPER_DEVICE
+        self.compute_type: str = config.WHISPER_COMPUTE_TYPE
         self._load_time: Optional[float] = None
         self._model_loaded: bool = False
+        # Log-mel constants for transcribe_batch, filled in at load time
+        self._mel_filters: Optional[np.ndarray] = None
+        self._window: Optional[np.ndarray] = None
+        self._init_state_listeners()
 
         self._initialized = True
         logger.info(f"WhisperService initialized with model size: {self.model_size}")
@@ -70,36 +102,54 @@ class WhisperService:
             logger.info("Whisper model already loaded, skipping reload")
             return
 
+        with self._lock:
+            # Another thread (e.g. startup pre-warm) may have just loaded it
+            if self._model_loaded and not force_reload:
+                return
+            self._load_model()
+
+    def _load_model(self) -> None:
+        """Load the model; callers must hold ``_lock``."""
         start_time = time.time()
 
         try:
+            import ctranslate2
+            from faster_whisper import WhisperModel
+
             # Determine device
             if self.device == "auto":
-                self.device = "cuda" if torch.cuda.is_available() else "cpu"
+                has_cuda = ctranslate2.get_cuda_device_count() > 0
+                self.device = "cuda" if has_cuda else "cpu"
             
             logger.info(f"Loading Whisper '{self.model_size}' model on {self.device}")
 
-            # Load model with specified options
-            model_kwargs = {
-                "model": self.model_size,
-                "device": self.device,
-                "download_root": str(config.MODEL_CACHE_DIR_ABSOLUTE),
-            }
-
-            # Add compute type for CUDA optimization
-            if self.device == "cuda":
-                compute_type = config.WHISPER_COMPUTE_TYPE
-                if compute_type == "default":
-                    compute_type = "float16" if torch.cuda.is_available() else "float32"
-                model_kwargs["compute_type"] = compute_type
+            # INT8 weights; FP16 activations on GPU
+            if self.compute_type == "default":
+                self.compute_type = (
+                    "int8_float16" if self.device == "cuda" else "int8"
+                )
+
+            self.model = WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=config.WHISPER_THREADS,
+                num_workers=config.WHISPER_NUM_WORKERS,
+                download_root=str(config.MODEL_CACHE_DIR_ABSOLUTE),
+            )
 
-            self.model = whisper.load_model(**model_kwargs)
+            # Cache the filterbank and STFT window for batched features
+            extractor = self.model.feature_extractor
+            self._mel_filters = np.asarray(extractor.mel_filters, dtype=np.float32)
+            self._window = np.hanning(extractor.n_fft + 1)[:-1].astype(np.float32)
 
             self._load_time = time.time() - start_time
             self._model_loaded = True
+            self._notify_state_changed()
 
             logger.info(
-                f"Whisper model loaded successfully in {self._load_time:.2f}s"
+                f"Whisper model loaded successfully in {self._load_time:.2f}s "
+                f"(compute_type={self.compute_type})"
             )
 
         except Exception as e:
@@ -139,45 +189,81 @@ class WhisperService:
         logger.info(f"Transcribing audio file: {audio_path.name}")
 
         try:
-            # Run transcription
-            options = {}
-            if language:
-                options["language"] = language
-
-            result = self.model.transcribe(
-                str(audio_path),
-                verbose=verbose,
-                **options
-            )
-
-            # Extract relevant information
-            text = result.get("text", "").strip()
-            language_detected = result.get("language", language or "unknown")
+            result = self._with_oom_retry(self._decode, str(audio_path), language)
 
-            # Calculate confidence from log probabilities if available
-            confidence = None
-            if "log_probs" in result and result["log_probs"] is not None:
-                # Average log probability converted to confidence
-                avg_log_prob = np.mean(result["log_probs"])
-                confidence = float(np.exp(avg_log_prob))  # Convert to 0-1 scale
+            if verbose:
+                logger.debug(f"Transcript: {result.text}")
 
             processing_time = time.time() - start_time
 
             logger.info(
-                f"Transcription complete: {len(text)} chars in {processing_time:.2f}s"
+                f"Transcription complete: {len(result.text)} chars "
+                f"in {processing_time:.2f}s"
             )
 
-            return TranscriptionResult(
-                text=text,
-                language=language_detected,
-                confidence=confidence,
-                duration=result.get("duration"),
+            return result
+
+        except Exception as e:
+            logger.error(f"Transcription failed: {e}")
+            raise RuntimeError(f"Transcription error: {e}")
+
+    def transcribe_segments(
+        self,
+        audio_path: Union[str, Path],
+        language: Optional[str] = None,
+    ) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Transcribe an audio file segment by segment.
+        
+        Mirrors the faster-whisper ``segments, info`` shape so callers can
+        start downstream work on early segments while later ones decode.
+        
+        Args:
+            audio_path: Path to the audio file
+            language: Language code (e.g., 'en'). Auto-detected if None
+            
+        Returns:
+            Tuple of (segment iterator, info dict). Each segment is a dict
+            with "text", "start" and "end"; info has "language" and
+            "duration".
+        """
+        if not self._model_loaded:
+            self.load_model()
+
+        audio_path = Path(audio_path)
+
+        if not audio_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+        logger.info(f"Transcribing audio file by segment: {audio_path.name}")
+
+        try:
+            # Segments decode lazily as the generator is consumed. Only this
+            # eager part (features, language detection) is retried on OOM;
+            # retrying mid-stream would repeat segments already yielded.
+            raw_segments, raw_info = self._with_oom_retry(
+                lambda: self.model.transcribe(
+                    str(audio_path),
+                    language=language,
+                    beam_size=1,
+                    vad_filter=False,
+                )
             )
 
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             raise RuntimeError(f"Transcription error: {e}")
 
+        info = {
+            "language": raw_info.language,
+            "duration": raw_info.duration,
+        }
+        segments = (
+            {"text": seg.text, "start": seg.start, "end": seg.end}
+            for seg in raw_segments
+        )
+        return segments, info
+
     def transcribe_numpy(
         self,
         audio_data: np.ndarray,
@@ -195,38 +281,273 @@ class WhisperService:
         Returns:
             TranscriptionResult with text and metadata
         """
-        start_time = time.time()
-
         if not self._model_loaded:
             self.load_model()
 
         logger.info(f"Transcribing numpy array: shape={audio_data.shape}")
 
         try:
-            # Create temporary file for whisper
-            with tempfile.NamedTemporaryFile(
-                suffix=".wav", delete=False
-            ) as tmp_file:
-                temp_path = tmp_file.name
+            audio = np.asarray(audio_data)
 
-            try:
-                # Save numpy array to WAV file
-                wavfile.write(temp_path, sample_rate, audio_data)
+            # Whisper expects mono float32 in [-1, 1]
+            if audio.ndim > 1:
+                audio = audio.mean(axis=1)
+            if np.issubdtype(audio.dtype, np.integer):
+                audio = audio.astype(np.float32) / np.iinfo(audio.dtype).max
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
 
-                # Transcribe using the saved file
-                result = self.transcribe(temp_path, language)
+            if sample_rate != WHISPER_SAMPLE_RATE:
+                audio = resample_audio(audio, sample_rate, WHISPER_SAMPLE_RATE)
 
-                return result
-
-            finally:
-                # Cleanup temp file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+            return self._transcribe_array(audio, language)
 
         except Exception as e:
             logger.error(f"NumPy transcription failed: {e}")
             raise RuntimeError(f"NumPy transcription error: {e}")
 
+    def _transcribe_array(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+    ) -> TranscriptionResult:
+        """
+        Transcribe 16 kHz mono float32 samples without touching disk.
+        
+        Args:
+            audio: Contiguous float32 array at 16 kHz
+            language: Language code. Auto-detected if None
+            
+        Returns:
+            TranscriptionResult with text and metadata
+        """
+        start_time = time.time()
+
+        result = self._with_oom_retry(self._decode, audio, language)
+
+        processing_time = time.time() - start_time
+
+        logger.info(
+            f"Transcription complete: {len(result.text)} chars "
+            f"in {processing_time:.2f}s"
+        )
+
+        return result
+
+    def transcribe_batch(
+        self,
+        chunks: List[np.ndarray],
+        language: Optional[str] = None,
+    ) -> List[TranscriptionResult]:
+        """
+        Transcribe several short clips with one batched encoder pass.
+        
+        Each clip is padded or trimmed to Whisper's 30 s window, so clips
+        longer than that should go through ``transcribe_numpy`` instead.
+        
+        Args:
+            chunks: 16 kHz mono float32 arrays, each at most 30 s
+            language: Language code. Detected per clip if None
+            
+        Returns:
+            One TranscriptionResult per chunk, in input order
+        """
+        if not chunks:
+            return []
+
+        start_time = time.time()
+
+        if not self._model_loaded:
+            self.load_model()
+
+        try:
+            features = self._log_mel_batch(chunks)
+            languages, outputs = self._with_oom_retry(
+                self._decode_batch, features, language
+            )
+
+            results = []
+            for chunk, lang, output in zip(chunks, languages, outputs):
+                tokenizer = self._tokenizer(lang)
+                tokens = [t for t in output.sequences_ids[0] if t < tokenizer.eot]
+                results.append(
+                    TranscriptionResult(
+                        text=tokenizer.decode(tokens).strip(),
+                        language=lang,
+                        # Length-normalized log probability
+                        confidence=float(np.exp(output.scores[0])),
+                        duration=len(chunk) / WHISPER_SAMPLE_RATE,
+                    )
+                )
+
+            processing_time = time.time() - start_time
+            logger.info(
+                f"Batch transcription complete: {len(chunks)} clips "
+                f"in {processing_time:.2f}s"
+            )
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Batch transcription failed: {e}")
+            raise RuntimeError(f"Batch transcription error: {e}")
+
+    def _decode(
+        self,
+        audio: Union[str, np.ndarray],
+        language: Optional[str],
+    ) -> TranscriptionResult:
+        """Run greedy decoding on a file path or 16 kHz array."""
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=1,
+            vad_filter=False,
+        )
+        return self._collect(segments, info)
+
+    def _decode_batch(
+        self,
+        features: np.ndarray,
+        language: Optional[str],
+    ) -> Tuple[List[str], List[Any]]:
+        """Encode stacked features once and greedy-decode every clip."""
+        import ctranslate2
+
+        # WhisperModel.encode adds its own batch axis before 1.1, so call
+        # the CTranslate2 encoder directly with the (B, n_mels, frames) stack
+        ct2_model = self.model.model
+        to_cpu = ct2_model.device == "cuda" and len(ct2_model.device_index) > 1
+        encoder_output = ct2_model.encode(
+            ctranslate2.StorageView.from_array(np.ascontiguousarray(features)),
+            to_cpu=to_cpu,
+        )
+        batch_size = len(features)
+
+        if not self.model.model.is_multilingual:
+            languages = ["en"] * batch_size
+        elif language is None:
+            # Top language token per clip, e.g. "<|en|>" -> "en"
+            detected = self.model.model.detect_language(encoder_output)
+            languages = [result[0][0][2:-2] for result in detected]
+        else:
+            languages = [language] * batch_size
+
+        prompts = [self._sot_prompt(lang) for lang in languages]
+        outputs = self.model.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=1,
+            max_length=self.model.max_length,
+            return_scores=True,
+        )
+        return languages, outputs
+
+    def _with_oom_retry(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Call ``fn``, retrying once after freeing cached GPU memory on OOM.
+        
+        Args:
+            fn: Inference callable
+            *args: Arguments passed to ``fn``
+            
+        Returns:
+            Whatever ``fn`` returns
+        """
+        try:
+            return fn(*args)
+        except RuntimeError as e:
+            # torch.cuda.OutOfMemoryError and CTranslate2 OOMs are both
+            # RuntimeErrors mentioning "out of memory"
+            if self.device != "cuda" or "out of memory" not in str(e).lower():
+                raise
+
+            logger.warning(f"CUDA out of memory, retrying after freeing cache: {e}")
+            import torch
+
+            gc.collect()
+            torch.cuda.empty_cache()
+            return fn(*args)
+
+    def _log_mel_batch(self, chunks: List[np.ndarray]) -> np.ndarray:
+        """
+        Whisper log-mel features for a batch of clips in one vectorized pass.
+        
+        Each clip is padded or trimmed to 30 s. Uses the filterbank and
+        window cached at load time.
+        
+        Args:
+            chunks: 16 kHz mono audio arrays
+            
+        Returns:
+            Float32 array of shape (batch, n_mels, frames)
+        """
+        extractor = self.model.feature_extractor
+        n_fft = extractor.n_fft
+
+        audio = np.zeros((len(chunks), extractor.n_samples), dtype=np.float32)
+        for row, chunk in zip(audio, chunks):
+            clip = np.asarray(chunk, dtype=np.float32)[: extractor.n_samples]
+            row[: len(clip)] = clip
+
+        # Centered STFT as in Whisper: reflect-pad, frame, drop the last frame
+        padded = np.pad(audio, ((0, 0), (n_fft // 2, n_fft // 2)), mode="reflect")
+        frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft, axis=1)
+        frames = frames[:, :: extractor.hop_length][:, :-1]
+        power = np.abs(np.fft.rfft(frames * self._window, axis=-1)) ** 2
+
+        mel = power @ self._mel_filters.T
+        log_spec = np.log10(np.maximum(mel, 1e-10))
+        log_spec = np.maximum(
+            log_spec, log_spec.max(axis=(1, 2), keepdims=True) - 8.0
+        )
+        log_spec = (log_spec + 4.0) / 4.0
+
+        return np.ascontiguousarray(log_spec.transpose(0, 2, 1), dtype=np.float32)
+
+    def _tokenizer(self, language: str) -> "Tokenizer":
+        """Whisper tokenizer set up for transcription in ``language``."""
+        from faster_whisper.tokenizer import Tokenizer
+
+        return Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task="transcribe",
+            language=language,
+        )
+
+    def _sot_prompt(self, language: str) -> List[int]:
+        """Decoder prompt: start-of-transcript tokens without timestamps."""
+        tokenizer = self._tokenizer(language)
+        return list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+
+    @staticmethod
+    def _collect(segments: Iterable[Any], info: Any) -> TranscriptionResult:
+        """
+        Drain a faster-whisper segment generator into a TranscriptionResult.
+        
+        Args:
+            segments: Segment generator from ``WhisperModel.transcribe``
+            info: TranscriptionInfo from the same call
+            
+        Returns:
+            TranscriptionResult with joined text, language and confidence
+        """
+        texts = []
+        log_probs = []
+        for segment in segments:
+            texts.append(segment.text)
+            log_probs.append(segment.avg_logprob)
+
+        # Mean segment log probability converted to a 0-1 confidence
+        confidence = float(np.exp(np.mean(log_probs))) if log_probs else None
+
+        return TranscriptionResult(
+            text="".join(texts).strip(),
+            language=info.language,
+            confidence=confidence,
+            duration=info.duration,
+        )
+
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model."""
         if not self._model_loaded:
@@ -237,11 +558,13 @@ class WhisperService:
             "device": self.device,
             "is_loaded": self._model_loaded,
             "load_time_seconds": self._load_time,
-            "num_parameters": self.model.num_parameters if self.model else None,
+            "compute_type": self.compute_type,
         }
 
-        # Add CUDA info if available
-        if torch.cuda.is_available():
+        # Add CUDA info when running on GPU
+        if self.device == "cuda":
+            import torch
+
             info["gpu_name"] = torch.cuda.get_device_name(0)
             info["gpu_memory_mb"] = torch.cuda.get_device_properties(
                 0
@@ -255,9 +578,12 @@ class WhisperService:
             del self.model
             self.model = None
             self._model_loaded = False
+            self._notify_state_changed()
 
             # Clear CUDA cache if available
-            if torch.cuda.is_available():
+            if self.device == "cuda":
+                import torch
+
                 torch.cuda.empty_cache()
 
             logger.info("Whisper model unloaded")
@@ -266,3 +592,14 @@ class WhisperService:
 # Global instance
 whisper_service = WhisperService()
 
+
+@lru_cache(maxsize=None)
+def get_whisper_service() -> WhisperService:
+    """
+    Get the shared WhisperService without going through ``__new__``.
+
+    Returns:
+        The process-wide WhisperService instance
+    """
+    return whisper_service
+
@@ -3,17 +3,17 @@ Audio processing utilities for Voice Sentiment Analysis.
 Handles audio format conversion, preprocessing, and validation.
 """
 
-import os
 import logging
 import tempfile
+from math import gcd
 from pathlib import Path
 from typing import Optional, Tuple, Union
 import subprocess
 import struct
+import threading
+import wave
 
 import numpy as np
-import scipy.io.wavfile as wav
-from scipy import signal
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +87,10 @@ def convert_to_wav(
     """
     Convert audio file to WAV format.
     
+    When no output path is given and the input is already a PCM_16 WAV
+    with the target rate and channel count, the input path is returned
+    unchanged.
+    
     Args:
         input_path: Path to input audio file
         output_path: Path for output WAV file (auto-generated if None)
@@ -99,36 +103,23 @@ def convert_to_wav(
     input_path = Path(input_path)
     
     if output_path is None:
+        # Already in the target format: hand the file back as-is
+        if input_path.suffix.lower() == ".wav":
+            probed = _probe_target_wav(input_path, sample_rate, mono)
+            if probed is not None:
+                return input_path, probed
+
         output_path = Path(tempfile.gettempdir()) / f"{input_path.stem}_converted.wav"
     else:
         output_path = Path(output_path)
 
     try:
-        # Use ffmpeg for conversion if available, else use scipy
+        # Decode in-process with PyAV; ffmpeg CLI for anything it can't handle
         try:
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", str(input_path),
-                "-ar", str(sample_rate),
-                "-ac", "1" if mono else "2",
-                "-codec:pcm_s16le",
-                str(output_path),
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60,
-            )
-            
-            if result.returncode != 0:
-                raise AudioProcessingError(f"FFmpeg error: {result.stderr}")
-
-        except FileNotFoundError:
-            # Fallback to scipy if ffmpeg not available
-            logger.warning("FFmpeg not found, using scipy for conversion")
-            _convert_with_scipy(input_path, output_path, sample_rate, mono)
+            _convert_with_av(input_path, output_path, sample_rate, mono)
+        except Exception as e:
+            logger.debug(f"PyAV conversion unavailable ({e}), using ffmpeg")
+            _convert_with_ffmpeg(input_path, output_path, sample_rate, mono)
 
     except Exception as e:
         logger.error(f"Audio conversion failed: {e}")
@@ -140,6 +131,93 @@ def convert_to_wav(
     return output_path, duration
 
 
+def _probe_target_wav(
+    input_path: Path,
+    sample_rate: int,
+    mono: bool,
+) -> Optional[float]:
+    """Return the duration if the file is already PCM_16 WAV at the target rate."""
+    try:
+        import soundfile as sf
+        info = sf.info(str(input_path))
+    except Exception:
+        return None
+
+    if (
+        info.samplerate == sample_rate
+        and info.channels == (1 if mono else 2)
+        and info.subtype == "PCM_16"
+    ):
+        return float(info.duration)
+    return None
+
+
+def _convert_with_av(
+    input_path: Path,
+    output_path: Path,
+    sample_rate: int,
+    mono: bool,
+) -> None:
+    """Decode and resample with libav in-process, writing 16-bit PCM WAV."""
+    import av
+
+    resampler = av.AudioResampler(
+        format="s16",
+        layout="mono" if mono else "stereo",
+        rate=sample_rate,
+    )
+
+    with av.open(str(input_path)) as container:
+        if not container.streams.audio:
+            raise AudioProcessingError(f"No audio stream in {input_path.name}")
+
+        with wave.open(str(output_path), "wb") as out:
+            out.setnchannels(1 if mono else 2)
+            out.setsampwidth(2)
+            out.setframerate(sample_rate)
+
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    out.writeframes(resampled.to_ndarray().tobytes())
+
+            # Flush samples buffered inside the resampler
+            for resampled in resampler.resample(None):
+                out.writeframes(resampled.to_ndarray().tobytes())
+
+
+def _convert_with_ffmpeg(
+    input_path: Path,
+    output_path: Path,
+    sample_rate: int,
+    mono: bool,
+) -> None:
+    """Convert audio with the ffmpeg CLI, falling back to scipy."""
+    try:
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", str(input_path),
+            "-ar", str(sample_rate),
+            "-ac", "1" if mono else "2",
+            "-codec:a", "pcm_s16le",
+            str(output_path),
+        ]
+
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+
+        if result.returncode != 0:
+            raise AudioProcessingError(f"FFmpeg error: {result.stderr}")
+
+    except FileNotFoundError:
+        # Fallback to scipy if ffmpeg not available
+        logger.warning("FFmpeg not found, using scipy for conversion")
+        _convert_with_scipy(input_path, output_path, sample_rate, mono)
+
+
 def _convert_with_scipy(
     input_path: Path,
     output_path: Path,
@@ -149,14 +227,13 @@ def _convert_with_scipy(
     """Convert audio using scipy (limited format support)."""
     try:
         import soundfile as sf
-        import librosa
 
         # Load audio
         audio, orig_sr = sf.read(str(input_path))
         
         # Resample if needed
         if orig_sr != sample_rate:
-            audio = librosa.resample(audio, orig_sr=orig_sr, target_sr=sample_rate)
+            audio = resample_audio(audio, orig_sr, sample_rate)
         
         # Convert to mono
         if mono and len(audio.shape) > 1:
@@ -173,6 +250,43 @@ def _convert_with_scipy(
         raise AudioProcessingError(f"Scipy conversion failed: {e}")
 
 
+def resample_audio(
+    audio_data: np.ndarray,
+    orig_sr: int,
+    target_sr: int,
+) -> np.ndarray:
+    """
+    Resample audio to a new sample rate.
+    
+    Uses soxr when installed, otherwise a scipy polyphase filter.
+    
+    Args:
+        audio_data: NumPy array of audio samples (samples first)
+        orig_sr: Current sample rate
+        target_sr: Desired sample rate
+        
+    Returns:
+        Resampled float32 audio array
+    """
+    audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
+    if orig_sr == target_sr:
+        return audio_data
+
+    try:
+        import soxr
+        return soxr.resample(audio_data, orig_sr, target_sr, quality="HQ")
+    except ImportError:
+        pass
+
+    from scipy import signal
+
+    g = gcd(orig_sr, target_sr)
+    resampled = signal.resample_poly(
+        audio_data, target_sr // g, orig_sr // g, axis=0
+    )
+    return resampled.astype(np.float32, copy=False)
+
+
 def get_audio_duration(file_path: Union[str, Path]) -> float:
     """
     Get the duration of an audio file in seconds.
@@ -186,7 +300,7 @@ def get_audio_duration(file_path: Union[str, Path]) -> float:
     file_path = Path(file_path)
     
     try:
-        # Try using scipy
+        # Header-only probe; no samples are decoded
         try:
             import soundfile as sf
             info = sf.info(str(file_path))
@@ -194,29 +308,65 @@ def get_audio_duration(file_path: Union[str, Path]) -> float:
         except ImportError:
             pass
         
-        # Fallback: read with scipy
-        sample_rate, data = wav.read(str(file_path))
-        duration = len(data) / sample_rate
-        return duration
+        # Fallback: parse the RIFF/WAV header directly
+        return _wav_header_duration(file_path)
         
     except Exception as e:
         logger.warning(f"Could not get audio duration: {e}")
         return 0.0
 
 
+def _wav_header_duration(file_path: Path) -> float:
+    """Read a PCM WAV's duration from its fmt and data chunk headers."""
+    with open(file_path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise AudioProcessingError(f"Not a WAV file: {file_path.name}")
+
+        byte_rate = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise AudioProcessingError(f"No data chunk in {file_path.name}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                byte_rate = struct.unpack("<I", fmt[8:12])[0]
+                # Chunks are word-aligned
+                f.seek(chunk_size % 2, 1)
+            elif chunk_id == b"data":
+                if not byte_rate:
+                    raise AudioProcessingError(f"No fmt chunk in {file_path.name}")
+                return chunk_size / byte_rate
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+
 def normalize_audio(audio_data: np.ndarray) -> np.ndarray:
     """
     Normalize audio data to prevent clipping.
     
+    Floating-point input is scaled in place; integer input is first
+    converted to float32.
+    
     Args:
         audio_data: NumPy array of audio samples
         
     Returns:
         Normalized audio array
     """
-    max_val = np.max(np.abs(audio_data))
-    if max_val > 0:
-        return audio_data / max_val
+    if not np.issubdtype(audio_data.dtype, np.floating):
+        audio_data = audio_data.astype(np.float32)
+
+    max_abs = float(np.max(np.abs(audio_data))) if audio_data.size else 0.0
+    if max_abs > 0:
+        np.multiply(
+            audio_data,
+            audio_data.dtype.type(1.0 / max_abs),
+            out=audio_data,
+            casting="same_kind",
+        )
     return audio_data
 
 
@@ -234,33 +384,34 @@ def remove_silence(
         audio_data: NumPy array of audio samples
         sample_rate: Sample rate of audio
         threshold_db: Silence threshold in dB
-        frame_length: FFT window size
+        frame_length: RMS window size in samples
         hop_length: Hop length between frames
         
     Returns:
         Audio with silence removed
     """
+    if len(audio_data) < frame_length:
+        return audio_data
+
     # Convert threshold from dB to amplitude
     threshold = 10 ** (threshold_db / 20)
-    
-    # Calculate silent frames
-    envelope = np.abs(
-        signal.hilbert(signal.medfilt(np.abs(audio_data), 101))
-    )
-    
-    # Find non-silent regions
-    non_silent = envelope > threshold
-    
-    # Get indices of non-silent regions
-    indices = np.where(non_silent)[0]
-    
+
+    # Frame RMS envelope, one frame every hop_length samples
+    power = np.square(audio_data, dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(power, frame_length)
+    frames = frames[::hop_length]
+    rms = np.sqrt(frames.mean(axis=1))
+
+    # Get indices of non-silent frames
+    indices = np.flatnonzero(rms > threshold)
+
     if len(indices) == 0:
         return audio_data
-    
-    # Get start and end points
-    start = max(0, indices[0] - frame_length)
-    end = min(len(audio_data), indices[-1] + frame_length)
-    
+
+    # Convert frame indices back to sample positions
+    start = indices[0] * hop_length
+    end = min(len(audio_data), indices[-1] * hop_length + frame_length)
+
     return audio_data[start:end]
 
 
@@ -285,25 +436,23 @@ def preprocess_audio(
     file_path = Path(file_path)
     
     try:
-        # Read audio file
-        try:
-            import soundfile as sf
-            audio_data, sample_rate = sf.read(str(file_path))
-        except ImportError:
-            sample_rate, audio_data = wav.read(str(file_path))
+        import soundfile as sf
+
+        # Decode straight into a preallocated float32 buffer
+        with sf.SoundFile(str(file_path)) as f:
+            sample_rate = f.samplerate
+            audio_data = np.empty((f.frames, f.channels), dtype=np.float32)
+            f.read(out=audio_data)
         
         # Convert to mono if stereo
-        if len(audio_data.shape) > 1:
+        if audio_data.shape[1] > 1:
             audio_data = np.mean(audio_data, axis=1)
+        else:
+            audio_data = audio_data.reshape(-1)
         
         # Resample if needed
         if sample_rate != target_sample_rate:
-            import librosa
-            audio_data = librosa.resample(
-                audio_data,
-                orig_sr=sample_rate,
-                target_sr=target_sample_rate
-            )
+            audio_data = resample_audio(audio_data, sample_rate, target_sample_rate)
             sample_rate = target_sample_rate
         
         # Normalize
@@ -335,44 +484,60 @@ def chunk_audio(
         chunk_duration_ms: Duration of each chunk in milliseconds
         
     Returns:
-        List of audio chunks as numpy arrays
+        List of audio chunks as numpy arrays. Full chunks are views into
+        ``audio_data``; copy them before modifying in place.
     """
     chunk_samples = int(sample_rate * chunk_duration_ms / 1000)
-    chunks = []
-    
-    for i in range(0, len(audio_data), chunk_samples):
-        chunk = audio_data[i : i + chunk_samples]
-        if len(chunk) > 0:
-            # Pad last chunk if needed
-            if len(chunk) < chunk_samples:
-                chunk = np.pad(chunk, (0, chunk_samples - len(chunk)))
-            chunks.append(chunk)
+    num_full = len(audio_data) // chunk_samples
+    split = num_full * chunk_samples
+
+    chunks = list(audio_data[:split].reshape(num_full, chunk_samples))
+
+    # Pad last chunk if needed
+    tail = audio_data[split:]
+    if tail.size:
+        chunks.append(np.pad(tail, (0, chunk_samples - tail.size)))
     
     return chunks
 
 
-def audio_to_base64(audio_data: np.ndarray, sample_rate: int) -> str:
+def audio_to_base64(
+    audio_data: np.ndarray,
+    sample_rate: int,
+    dtype: str = "float32",
+) -> str:
     """
     Convert numpy audio array to base64 encoded WAV string.
     
     Args:
         audio_data: NumPy array of audio samples
         sample_rate: Sample rate
+        dtype: Sample format of the WAV, "float32" or "int16"
         
     Returns:
         Base64 encoded WAV string
     """
     import base64
+    import io
     
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        wav.write(tmp.name, sample_rate, audio_data.astype(np.int16))
-        
-        with open(tmp.name, "rb") as f:
-            audio_b64 = base64.b64encode(f.read()).decode("utf-8")
-        
-        os.unlink(tmp.name)
+    # Build the WAV in memory; no temp file needed
+    buf = io.BytesIO()
+    if dtype == "float32":
+        import soundfile as sf
+        sf.write(
+            buf,
+            audio_data.astype(np.float32, copy=False),
+            sample_rate,
+            format="WAV",
+            subtype="FLOAT",
+        )
+    elif dtype == "int16":
+        import scipy.io.wavfile as wav
+        wav.write(buf, sample_rate, audio_data.astype(np.int16, copy=False))
+    else:
+        raise ValueError(f"Unsupported dtype: {dtype}")
     
-    return audio_b64
+    return base64.b64encode(buf.getbuffer()).decode("utf-8")
 
 
 def base64_to_audio(base64_string: str) -> Tuple[np.ndarray, int]:
@@ -383,15 +548,17 @@ def base64_to_audio(base64_string: str) -> Tuple[np.ndarray, int]:
         base64_string: Base64 encoded audio string
         
     Returns:
-        Tuple of (audio_data, sample_rate)
+        Tuple of (audio_data, sample_rate); samples are float32 in [-1, 1]
     """
     import base64
     import io
+
+    import soundfile as sf
     
     audio_bytes = base64.b64decode(base64_string)
     
-    # Read as WAV
-    sample_rate, audio_data = wav.read(io.BytesIO(audio_bytes))
+    # Read as WAV, decoding straight to float32
+    audio_data, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype="float32")
     
     return audio_data, sample_rate
 
@@ -400,7 +567,8 @@ class AudioBuffer:
     """
     Ring buffer for streaming audio processing.
     
-    Maintains a rolling window of audio samples.
+    Maintains a rolling window of audio samples in a preallocated float32
+    array, so appends copy only the new samples.
     """
     
     def __init__(
@@ -417,19 +585,40 @@ class AudioBuffer:
         """
         self.sample_rate = sample_rate
         self.max_samples = int(sample_rate * max_duration)
-        self.buffer: np.ndarray = np.zeros(0)
-        self._lock = False
+        self._buf = np.empty(self.max_samples, dtype=np.float32)
+        self._head = 0  # next write position
+        self._filled = 0
+        self._lock = threading.Lock()
     
     def append(self, data: np.ndarray) -> None:
-        """Append new audio data to buffer."""
-        if self._lock:
+        """Append new audio data to buffer, overwriting the oldest samples."""
+        data = np.asarray(data)
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        if np.issubdtype(data.dtype, np.integer):
+            # Integer PCM is stored scaled to [-1, 1]
+            data = data.astype(np.float32) / np.iinfo(data.dtype).max
+
+        # Only the newest max_samples can survive
+        data = data[-self.max_samples:]
+        n = len(data)
+        if n == 0:
             return
-        
-        self.buffer = np.concatenate([self.buffer, data])
-        
-        # Trim if exceeding max size
-        if len(self.buffer) > self.max_samples:
-            self.buffer = self.buffer[-self.max_samples:]
+
+        with self._lock:
+            first = min(n, self.max_samples - self._head)
+            np.copyto(self._buf[self._head:self._head + first], data[:first])
+            if first < n:
+                np.copyto(self._buf[:n - first], data[first:])
+
+            self._head = (self._head + n) % self.max_samples
+            self._filled = min(self._filled + n, self.max_samples)
+
+    def _ordered(self) -> np.ndarray:
+        """Copy out buffered samples oldest-first; callers hold ``_lock``."""
+        if self._filled < self.max_samples:
+            return self._buf[:self._filled].copy()
+        return np.concatenate((self._buf[self._head:], self._buf[:self._head]))
     
     def get_chunk(
         self,
@@ -446,30 +635,33 @@ class AudioBuffer:
         Returns:
             Audio chunk as numpy array
         """
-        start_sample = int((len(self.buffer) - start_offset * self.sample_rate))
-        end_sample = int(start_sample + duration * self.sample_rate)
-        
-        start_sample = max(0, start_sample)
-        end_sample = min(len(self.buffer), end_sample)
-        
-        if start_sample >= end_sample:
-            return np.zeros(0)
-        
-        return self.buffer[start_sample:end_sample]
+        with self._lock:
+            start_sample = int((self._filled - start_offset * self.sample_rate))
+            end_sample = int(start_sample + duration * self.sample_rate)
+
+            start_sample = max(0, start_sample)
+            end_sample = min(self._filled, end_sample)
+
+            if start_sample >= end_sample:
+                return np.zeros(0, dtype=np.float32)
+
+            return self._ordered()[start_sample:end_sample]
     
     def clear(self) -> None:
         """Clear the buffer."""
-        self.buffer = np.zeros(0)
+        with self._lock:
+            self._head = 0
+            self._filled = 0
     
     def get_all(self) -> np.ndarray:
         """Get all buffered audio."""
-        return self.buffer.copy()
+        with self._lock:
+            return self._ordered()
     
     def is_empty(self) -> bool:
         """Check if buffer is empty."""
-        return len(self.buffer) == 0
+        return self._filled == 0
     
     def length_seconds(self) -> float:
         """Get current buffer duration in seconds."""
-        return len(self.buffer) / self.sample_rate
-
+        return self._filled / self.sample_rate